@@ -1,24 +1,122 @@
 import os
+import re
+import asyncio
+import ast
 import time
 import json
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-import google.generativeai as genai
-from google import genai as new_genai
-from PIL import Image
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Callable, Iterator, Tuple, NamedTuple, Type
 from config import Config
 from prompts import *
+from schemas import ProductDetails
+from pydantic import BaseModel, ValidationError
 from io import BytesIO
-import base64
+try:
+    import pybase64 as base64  # SIMD-accelerated drop-in for the stdlib module
+except ImportError:
+    import base64
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from web_search_service import WebSearchService
+from fallbacks import note_fallback
+
+# PIL and the Gemini SDKs are imported on first use to keep module import (and cold start) cheap
+if TYPE_CHECKING:
+    import aiohttp
+    from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+class Tutorial(NamedTuple):
+    """One scraped tutorial, flattened out of the nested scrape results"""
+    success: bool
+    url: str
+    title: str
+    content: str
+    steps: List[str]
+    materials: List[str]
+    error: str
+
+JSON_DECODER = json.JSONDecoder()
+MAX_WEB_CONTEXT_CHARS = 4000  # Limit context size
+GENERATED_IMAGES_DIR = "static/generated_images"
+# Colors and finishes in one alternation so each tutorial is scanned in a single pass
+VISUAL_KEYWORD_PATTERN = re.compile(
+    r'\b(?:(?P<color>red|blue|green|yellow|white|black|brown|purple|orange|pink)'
+    r'|(?P<finish>glossy|matte|rustic|modern|vintage|polished|painted))\b',
+    re.IGNORECASE
+)
+MAX_VISUAL_DETAILS = 2  # Color/finish hints appended to each image prompt
+MAX_IMAGE_EDGE = 1024  # Longest edge of images the basic DIY fallback sends to Gemini
+PNG_COMPRESS_LEVEL = 1  # Generated images are transient; favour encode speed over file size
+
+def _loads_json_object(text: str, start: int) -> Dict[str, Any]:
+    """Parse the JSON object starting at text[start], preferring orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text[start:text.rfind('}') + 1])
+        except orjson.JSONDecodeError:
+            pass  # e.g. prose between two objects; let raw_decode take just the first one
+    result, _ = JSON_DECODER.raw_decode(text, start)
+    return result
+
+@lru_cache(maxsize=256)
+def _visual_details_for(content: str) -> Tuple[str, ...]:
+    """Color/finish hints for one tutorial's content; memoized since the same pages recur across requests"""
+    color = None
+    finish = None
+    
+    # Take the first color and the first finish mentioned, stopping once both are found
+    for match in VISUAL_KEYWORD_PATTERN.finditer(content):
+        if match.lastgroup == 'color':
+            color = color or match.group('color').lower()
+        else:
+            finish = finish or match.group('finish').lower()
+        if color and finish:
+            break
+    
+    details = []
+    if color:
+        details.append(f"with {color} accents")
+    if finish:
+        details.append(f"featuring {finish} finish")
+    
+    return tuple(details)
+
+def load_image(path: str) -> "Image.Image":
+    """Decode an upload at full resolution, since product analysis reads labels and small print from it"""
+    from PIL import Image
+    
+    image = Image.open(path)
+    image.load()
+    return image
+
+def load_downscaled_image(path: str, image: Optional["Image.Image"] = None) -> "Image.Image":
+    """Image capped at MAX_IMAGE_EDGE for the basic DIY fallback, decoded from path or copied from an already-decoded image"""
+    from PIL import Image
+    
+    if image is None:
+        image = Image.open(path)
+        # Lets the JPEG decoder scale down by a power of two while decoding
+        image.draft('RGB', (MAX_IMAGE_EDGE, MAX_IMAGE_EDGE))
+    else:
+        # thumbnail() resizes in place; the caller's full-resolution image stays untouched
+        image = image.copy()
+    image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.Resampling.LANCZOS)
+    return image
+
 class AIService:
-    def __init__(self):
+    def __init__(self, http_session: Optional["aiohttp.ClientSession"] = None):
         if not Config.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is required")
         
+        import google.generativeai as genai
+        from google import genai as new_genai
+        
         # Initialize both versions of genai client
         genai.configure(api_key=Config.GEMINI_API_KEY)
         self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
@@ -26,8 +124,11 @@ class AIService:
         # Initialize new genai client for image generation
         self.new_client = new_genai.Client(api_key=Config.GEMINI_API_KEY)
         
-        # Initialize web search service
-        self.web_search = WebSearchService()
+        # Initialize web search service, sharing the app's pooled HTTP session when given
+        self.web_search = WebSearchService(http_session=http_session)
+        
+        # Output directory for generated images, created once rather than per image
+        os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
         
         logger.info(f"AI Service initialized with model: {Config.GEMINI_MODEL}")
 
@@ -36,77 +137,97 @@ class AIService:
         logger.info(f"🔍 Starting product analysis for file: {file_path}")
         
         try:
-            # For images, we'll use PIL to load and pass directly
-            # For videos, we'll need to handle differently
             file_ext = os.path.splitext(file_path)[1].lower()
             logger.info(f"📄 File extension detected: {file_ext}")
             
-            if file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                logger.info("🖼️ Processing as image file...")
-                # Handle image files
-                image = Image.open(file_path)
-                logger.info(f"✅ Image loaded successfully - Size: {image.size}, Mode: {image.mode}")
-                
-                # Generate product analysis focused on environmental aspects
-                logger.info("🤖 Sending to Gemini for product analysis...")
-                response = self.model.generate_content([PRODUCT_ANALYSIS_PROMPT, image])
-                logger.info("✅ Received response from Gemini")
-                
-                # Parse the response text to extract JSON
-                response_text = response.text.strip()
-                logger.info(f"📝 Response length: {len(response_text)} characters")
-                logger.debug(f"🔍 Response preview: {response_text[:200]}...")
-                
-                # Try to extract JSON from the response
-                try:
-                    # Look for JSON content in the response
-                    import re
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        logger.info("✅ Found JSON structure in response")
-                        result = json.loads(json_match.group())
-                        logger.info("✅ Successfully parsed JSON response")
-                    else:
-                        logger.warning("⚠️ No JSON found, using fallback parser")
-                        # Fallback: create structure from text response
-                        result = self._parse_product_response(response_text)
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ JSON parsing failed: {e}")
-                    logger.info("🔄 Using fallback response parser")
-                    # Fallback parsing
-                    result = self._parse_product_response(response_text)
-            else:
-                logger.warning(f"⚠️ Unsupported file type: {file_ext}")
-                # For video files or if upload is needed, we'll use a simplified approach
-                # Since video upload API might not be available, we'll treat as image for now
-                image = Image.open(file_path) if file_ext in ['.jpg', '.jpeg', '.png'] else None
-                if not image:
-                    logger.error(f"❌ Cannot process file type: {file_ext}")
-                    # If it's a video, extract first frame or use placeholder
-                    raise Exception(f"Unsupported file type: {file_ext}. Please use image files.")
-                
-                response = self.model.generate_content([PRODUCT_ANALYSIS_PROMPT, image])
-                
-                # Parse the response text to extract JSON
-                response_text = response.text.strip()
-                
-                # Try to extract JSON from the response
-                try:
-                    import re
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        result = json.loads(json_match.group())
-                    else:
-                        result = self._parse_product_response(response_text)
-                except json.JSONDecodeError:
-                    result = self._parse_product_response(response_text)
+            if file_ext not in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
+                logger.error(f"❌ Cannot process file type: {file_ext}")
+                raise ValueError(f"Unsupported file type: {file_ext}. Please use image files.")
             
-            return result
+            logger.info("🖼️ Processing as image file...")
+            image = await asyncio.to_thread(load_image, file_path)
+            logger.info(f"✅ Image loaded successfully - Size: {image.size}, Mode: {image.mode}")
+            
+            # Generate product analysis focused on environmental aspects
+            logger.info("🤖 Sending to Gemini for product analysis...")
+            return await self._gemini_json([PRODUCT_ANALYSIS_PROMPT, image], self._parse_product_response, schema=ProductDetails)
             
         except Exception as e:
             logger.error(f"Error in product analysis: {e}")
             raise
     
+    async def _generate_content(self, contents: Any) -> Any:
+        """Run the blocking Gemini SDK call in a worker thread so the event loop keeps serving other requests"""
+        return await asyncio.to_thread(self.model.generate_content, contents)
+
+    def _stream_json_text(self, contents: Any) -> str:
+        """Stream a Gemini response and stop reading as soon as the first top-level JSON object closes"""
+        response = self.model.generate_content(contents, stream=True)
+        chunks = []
+        depth = 0
+        in_string = False
+        escaped = False
+        
+        for chunk in response:
+            text = chunk.text
+            for i, ch in enumerate(text):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif ch == '\\':
+                        escaped = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"':
+                    in_string = depth > 0
+                elif ch == '{':
+                    depth += 1
+                elif ch == '}' and depth > 0:
+                    depth -= 1
+                    if depth == 0:
+                        chunks.append(text[:i + 1])
+                        return "".join(chunks)
+            chunks.append(text)
+        
+        return "".join(chunks)
+
+    async def _gemini_json(self, contents: Any, fallback_parser: Callable[[str], Dict[str, Any]], stream: bool = False, schema: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+        """Call Gemini and extract the JSON object from its response, using fallback_parser when none is found"""
+        if stream:
+            response_text = (await asyncio.to_thread(self._stream_json_text, contents)).strip()
+        else:
+            response = await self._generate_content(contents)
+            response_text = response.text.strip()
+        logger.info("✅ Received response from Gemini")
+        
+        logger.info(f"📝 Response length: {len(response_text)} characters")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🔍 Response preview: {response_text[:200]}...")
+        
+        try:
+            # raw_decode parses the first balanced object in C and ignores any trailing prose,
+            # instead of a DOTALL regex pass followed by a second full parse
+            json_start = response_text.find('{')
+            if json_start != -1:
+                if schema is not None:
+                    # pydantic-core parses and validates in one Rust pass
+                    try:
+                        result = schema.model_validate_json(response_text[json_start:response_text.rfind('}') + 1]).model_dump()
+                        logger.info("✅ Successfully parsed and validated JSON response")
+                        return result
+                    except ValidationError as e:
+                        logger.warning(f"⚠️ Schema validation failed ({e.error_count()} errors), parsing without schema")
+                result = _loads_json_object(response_text, json_start)
+                logger.info("✅ Successfully parsed JSON response")
+                return result
+            logger.warning("⚠️ No JSON found, using fallback parser")
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ JSON parsing failed: {e}")
+            logger.info("🔄 Using fallback response parser")
+        
+        note_fallback(fallback_parser.__name__)
+        return fallback_parser(response_text)
+    
     def _parse_product_response(self, response_text: str) -> Dict[str, Any]:
         """Parse product analysis response text into structured data"""
         return {
@@ -123,71 +244,49 @@ class AIService:
         logger.info(f"🌱 Starting environmental impact analysis for: {product_details.get('product_name', 'Unknown Product')}")
         
         try:
-            # Generate search queries for environmental research
-            logger.info("🔍 Step 1: Generating search queries for environmental research...")
-            search_queries = await self._generate_search_queries(product_details)
-            logger.info(f"✅ Generated {len(search_queries)} search queries: {search_queries}")
-            
-            # Perform comprehensive web search using Tavily
-            logger.info("🌐 Step 2: Performing comprehensive web search using Tavily...")
-            web_search_results = await self.web_search.search_product_info(search_queries)
+            materials_str = ", ".join(product_details.get("materials") or [])
+            
+            # The sustainability lookup only needs the name/manufacturer, so it runs
+            # alongside query generation + search instead of after it
+            logger.info("🌐 Steps 1-3: Generating queries, searching with Tavily and fetching sustainability data concurrently...")
+            web_search_results, sustainability_data = await asyncio.gather(
+                self._search_with_generated_queries(product_details, materials_str),
+                self.web_search.get_sustainability_data(
+                    product_details.get("product_name", ""),
+                    product_details.get("manufacturer", "")
+                )
+            )
             logger.info(f"✅ Web search completed with {len(web_search_results)} query results")
+            logger.info(f"✅ Sustainability data retrieved with {len(sustainability_data)} data points")
             
             # Log search results summary
-            for query_key, query_result in web_search_results.items():
-                if isinstance(query_result, dict):
-                    logger.debug(f"   🔍 {query_key}: {query_result.get('query', 'Unknown query')}")
-                    logger.debug(f"      💡 Answer length: {len(query_result.get('answer', ''))} chars")
-                    logger.debug(f"      📄 Results count: {len(query_result.get('results', []))}")
-            
-            # Get additional sustainability data
-            logger.info("📊 Step 3: Getting additional sustainability data...")
-            sustainability_data = await self.web_search.get_sustainability_data(
-                product_details.get("product_name", ""),
-                product_details.get("manufacturer", "")
-            )
-            logger.info(f"✅ Sustainability data retrieved with {len(sustainability_data)} data points")
+            if logger.isEnabledFor(logging.DEBUG):
+                for query_key, query_result in web_search_results.items():
+                    if isinstance(query_result, dict):
+                        logger.debug(f"   🔍 {query_key}: {query_result.get('query', 'Unknown query')}")
+                        logger.debug(f"      💡 Answer length: {len(query_result.get('answer', ''))} chars")
+                        logger.debug(f"      📄 Results count: {len(query_result.get('results', []))}")
             
             # Format web context for LLM
             logger.info("📝 Step 4: Formatting web context for LLM analysis...")
             web_context = self._format_web_context(web_search_results, sustainability_data)
             logger.info(f"✅ Web context formatted - Length: {len(web_context)} characters")
-            logger.debug(f"🔍 Web context preview: {web_context[:300]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 Web context preview: {web_context[:300]}...")
             
             # Analyze environmental impact with comprehensive web context
             logger.info("🤖 Step 5: Sending to Gemini for environmental impact analysis...")
-            prompt = ENVIRONMENTAL_ANALYSIS_PROMPT.render(
+            prompt = build_environmental_analysis_prompt(
                 product_name=product_details.get("product_name", ""),
                 product_description=product_details.get("product_description", ""),
-                materials=", ".join(product_details.get("materials", [])),
+                materials=materials_str,
                 manufacturing_location=product_details.get("manufacturing_location", "Unknown"),
                 packaging_info=product_details.get("packaging_info", ""),
                 web_context=web_context
             )
-            logger.debug(f"📝 Prompt length: {len(prompt)} characters")
-            
-            response = self.model.generate_content(prompt)
-            logger.info("✅ Received environmental analysis response from Gemini")
+            logger.debug("📝 Prompt length: %d characters", len(prompt))
             
-            # Parse response
-            response_text = response.text.strip()
-            logger.info(f"📝 Environmental analysis response length: {len(response_text)} characters")
-            logger.debug(f"🔍 Response preview: {response_text[:300]}...")
-            
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    logger.info("✅ Found JSON structure in environmental analysis")
-                    result = json.loads(json_match.group())
-                    logger.info("✅ Successfully parsed environmental analysis JSON")
-                else:
-                    logger.warning("⚠️ No JSON found in environmental analysis, using fallback parser")
-                    result = self._parse_environmental_response(response_text)
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ Environmental analysis JSON parsing failed: {e}")
-                logger.info("🔄 Using fallback environmental response parser")
-                result = self._parse_environmental_response(response_text)
+            result = await self._gemini_json(prompt, self._parse_environmental_response)
             
             # Log analysis results summary
             logger.info("📊 Environmental Analysis Results Summary:")
@@ -203,6 +302,12 @@ class AIService:
             logger.error(f"💥 Error in environmental impact analysis: {str(e)}", exc_info=True)
             raise
     
+    async def _search_with_generated_queries(self, product_details: Dict[str, Any], materials_str: str) -> Dict[str, Any]:
+        """Generate environmental research queries for the product and run them through Tavily"""
+        search_queries = await self._generate_search_queries(product_details, materials_str)
+        logger.info(f"✅ Generated {len(search_queries)} search queries: {search_queries}")
+        return await self.web_search.search_product_info(search_queries)
+    
     def _parse_environmental_response(self, response_text: str) -> Dict[str, Any]:
         """Parse environmental analysis response text into structured data"""
         return {
@@ -212,30 +317,43 @@ class AIService:
             "sustainability_score": 5
         }
 
-    async def _generate_search_queries(self, product_details: Dict[str, Any]) -> List[str]:
+    async def _generate_search_queries(self, product_details: Dict[str, Any], materials_str: Optional[str] = None) -> List[str]:
         try:
             prompt = SEARCH_QUERIES_PROMPT.render(
                 product_name=product_details.get("product_name", ""),
                 product_description=product_details.get("product_description", ""),
-                materials=", ".join(product_details.get("materials", [])),
+                materials=materials_str if materials_str is not None else ", ".join(product_details.get("materials") or []),
                 manufacturing_location=product_details.get("manufacturing_location", "Unknown")
             )
             
-            response = self.model.generate_content(prompt)
+            response = await self._generate_content(prompt)
             queries_text = response.text.strip()
             
-            try:
-                import ast
-                queries = ast.literal_eval(queries_text)
-                return queries if isinstance(queries, list) else []
-            except:
-                # Fallback: split by lines and clean up
-                lines = queries_text.split('\n')
-                queries = [line.strip('- "\'') for line in lines if line.strip() and not line.strip().startswith('[')]
-                return queries[:4]  # Limit to 4 queries
+            # The prompt asks for a JSON array; slicing to the brackets also tolerates ```json fences.
+            # Only pay for an AST parse when the model still answers with a Python-style (single-quoted) list
+            list_start = queries_text.find('[')
+            list_end = queries_text.rfind(']')
+            if list_start != -1 and list_end > list_start:
+                list_text = queries_text[list_start:list_end + 1]
+                try:
+                    queries = json.loads(list_text)
+                    return queries if isinstance(queries, list) else []
+                except ValueError:
+                    pass
+                try:
+                    queries = ast.literal_eval(list_text)
+                    return queries if isinstance(queries, list) else []
+                except (ValueError, SyntaxError):
+                    pass
+            
+            # Fallback: split by lines and clean up
+            lines = queries_text.split('\n')
+            queries = [line.strip('- "\'') for line in lines if line.strip() and not line.strip().startswith('[')]
+            return queries[:4]  # Limit to 4 queries
                 
         except Exception as e:
             logger.error(f"Error generating search queries: {e}")
+            note_fallback("search_queries")
             return []
 
     async def _get_web_context(self, search_queries: List[str]) -> str:
@@ -257,15 +375,17 @@ class AIService:
                 alternatives=", ".join(env_analysis.get("alternatives", []))
             )
             
-            response = self.model.generate_content(prompt)
+            response = await self._generate_content(prompt)
             return response.text.strip()
             
         except Exception as e:
             logger.error(f"Error generating recommendation: {e}")
+            note_fallback("recommendation")
             return "Unable to generate recommendation at this time."
 
     async def generate_diy_projects(self, file_path: str) -> Dict[str, Any]:
         """Generate enhanced DIY project ideas using web scraping for real tutorials"""
+        image = None
         try:
             # Handle image files directly with PIL
             file_ext = os.path.splitext(file_path)[1].lower()
@@ -274,10 +394,10 @@ class AIService:
                 raise Exception(f"Unsupported file type: {file_ext}. Please use image files.")
             
             # First, analyze the product to understand what it is
-            image = Image.open(file_path)
+            image = await asyncio.to_thread(load_image, file_path)
             
             # Quick product identification
-            product_identification = self.model.generate_content([
+            product_identification = await self._generate_content([
                 "Identify this product in 1-2 words and list its main materials. Format: Product: [name], Materials: [material1, material2]",
                 image
             ])
@@ -308,79 +428,80 @@ class AIService:
             search_duration = time.time() - search_start_time
             
             logger.info(f"🌐 DIY tutorial search completed in {search_duration:.2f}s")
-            logger.info(f"📚 Found {len(diy_tutorials)} tutorial sources")
+            
+            # Flatten the nested per-query scrape results once; everything below reads this list
+            tutorials = self._flatten_tutorials(diy_tutorials)
+            logger.info(f"📚 Found {len(tutorials)} tutorial sources")
             
             # Log tutorial sources found
-            for i, tutorial in enumerate(diy_tutorials[:3]):  # Log first 3
-                if tutorial.get('success', False):
-                    logger.info(f"   📄 Tutorial {i+1}: {tutorial.get('title', 'No title')}")
-                    logger.info(f"      🔗 URL: {tutorial.get('url', '')}")
-                    logger.info(f"      📋 Steps: {tutorial.get('steps_found', 0)}")
-                    logger.info(f"      🛠️ Materials: {tutorial.get('materials_found', 0)}")
+            for i, tutorial in enumerate(tutorials[:3]):  # Log first 3
+                if tutorial.success:
+                    logger.info(f"   📄 Tutorial {i+1}: {tutorial.title or 'No title'}")
+                    logger.info(f"      🔗 URL: {tutorial.url}")
+                    logger.info(f"      📋 Steps: {len(tutorial.steps)}")
+                    logger.info(f"      🛠️ Materials: {len(tutorial.materials)}")
                 else:
-                    logger.warning(f"   ❌ Tutorial {i+1} failed: {tutorial.get('error', 'Unknown error')}")
+                    logger.warning(f"   ❌ Tutorial {i+1} failed: {tutorial.error}")
             
-            if len(diy_tutorials) > 3:
-                logger.info(f"   ... and {len(diy_tutorials) - 3} more tutorials")
+            if len(tutorials) > 3:
+                logger.info(f"   ... and {len(tutorials) - 3} more tutorials")
                 
             # Count successful tutorials
-            successful_tutorials = len([t for t in diy_tutorials if t.get('success', False)])
-            logger.info(f"✅ Successfully scraped {successful_tutorials}/{len(diy_tutorials)} tutorials")
+            successful_tutorials = sum(1 for t in tutorials if t.success)
+            logger.info(f"✅ Successfully scraped {successful_tutorials}/{len(tutorials)} tutorials")
             
             # Create enhanced prompt with web-scraped tutorial data
-            enhanced_prompt = self._create_enhanced_diy_prompt(product_name, materials, diy_tutorials)
+            enhanced_prompt = self._create_enhanced_diy_prompt(product_name, materials, tutorials)
             
             # Generate DIY projects with enhanced context
-            response = self.model.generate_content([enhanced_prompt, image])
+            result = await self._gemini_json([enhanced_prompt, image], self._parse_diy_response)
             
-            # Parse response
-            response_text = response.text.strip()
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                else:
-                    result = self._parse_diy_response(response_text)
-            except json.JSONDecodeError:
-                result = self._parse_diy_response(response_text)
+            # Walk the scraped tutorials once for both image prompt details and response sources
+            visual_details, tutorial_sources = self._process_tutorials(tutorials)
             
             # Enhance image generation prompts with real tutorial insights
+            image_jobs = []
             for difficulty in ['easy', 'medium', 'hard']:
                 if difficulty in result:
                     # Enhance the image generation prompt with context from scraped tutorials
                     if 'image_generation_prompt' in result[difficulty]:
                         enhanced_image_prompt = self._enhance_image_prompt(
                             result[difficulty]['image_generation_prompt'],
-                            diy_tutorials,
-                            product_name
+                            visual_details
                         )
                         
                         project_name = result[difficulty].get('project_name', f'{difficulty}_project').replace(' ', '_')
-                        
-                        # Generate image with enhanced prompt
-                        img_base64, img_filename = self.generate_product_image(enhanced_image_prompt, f"{difficulty}_{project_name}")
-                        
-                        if img_base64 and img_filename:
-                            result[difficulty]['generated_image'] = {
-                                'base64': img_base64,
-                                'filename': img_filename,
-                                'url': f"/static/generated_images/{img_filename}"
-                            }
-                            logger.info(f"Generated enhanced image for {difficulty} project")
-                        else:
-                            logger.warning(f"Failed to generate image for {difficulty} project")
+                        image_jobs.append((difficulty, enhanced_image_prompt, f"{difficulty}_{project_name}"))
+            
+            # Generate the images concurrently; each call blocks on Gemini in its own worker thread
+            generated_images = await asyncio.gather(*(
+                asyncio.to_thread(self.generate_product_image, prompt, image_name)
+                for _, prompt, image_name in image_jobs
+            ))
+            
+            for (difficulty, _, _), (img_base64, img_filename) in zip(image_jobs, generated_images):
+                if img_base64 and img_filename:
+                    result[difficulty]['generated_image'] = {
+                        'base64': img_base64,
+                        'filename': img_filename,
+                        'url': f"/static/generated_images/{img_filename}"
+                    }
+                    logger.info(f"Generated enhanced image for {difficulty} project")
+                else:
+                    logger.warning(f"Failed to generate image for {difficulty} project")
+                    note_fallback(f"{difficulty}_image")
             
             # Add tutorial sources to result
-            result['tutorial_sources'] = self._extract_tutorial_sources(diy_tutorials)
+            result['tutorial_sources'] = tutorial_sources
             
             return result
             
         except Exception as e:
             logger.error(f"Error in enhanced DIY analysis: {e}")
             # Fallback to basic analysis
+            note_fallback("basic_diy")
             try:
-                return await self._generate_basic_diy_projects(file_path)
+                return await self._generate_basic_diy_projects(file_path, image)
             except:
                 raise e
     
@@ -460,20 +581,30 @@ class AIService:
             # Extract image from response
             for part in response.candidates[0].content.parts:
                 if part.inline_data is not None:
-                    # Convert to PIL Image
-                    image = Image.open(BytesIO(part.inline_data.data))
+                    raw = part.inline_data.data
+                    mime_type = getattr(part.inline_data, 'mime_type', None)
+                    
+                    if mime_type == 'image/png':
+                        # Already PNG: keep the model's bytes as-is, no decode/re-encode
+                        png_bytes = raw
+                    else:
+                        # Convert to PNG with fast zlib settings
+                        from PIL import Image
+                        image = Image.open(BytesIO(raw))
+                        img_buffer = BytesIO()
+                        image.save(img_buffer, format='PNG', optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+                        png_bytes = img_buffer.getvalue()
                     
-                    # Save image to static directory
-                    os.makedirs("static/generated_images", exist_ok=True)
+                    # Save image to static directory; the content hash keeps the name unique so it can be cached as immutable
                     timestamp = int(time.time())
-                    filename = f"{project_name}_{timestamp}.png"
-                    filepath = f"static/generated_images/{filename}"
-                    image.save(filepath)
+                    content_hash = hashlib.blake2b(png_bytes, digest_size=6).hexdigest()
+                    filename = f"{project_name}_{timestamp}_{content_hash}.png"
+                    filepath = os.path.join(GENERATED_IMAGES_DIR, filename)
+                    with open(filepath, "wb") as f:
+                        f.write(png_bytes)
                     
                     # Convert to base64 for API response
-                    img_buffer = BytesIO()
-                    image.save(img_buffer, format='PNG')
-                    img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+                    img_base64 = base64.b64encode(png_bytes).decode('utf-8')
                     
                     logger.info(f"Image generated successfully: {filename}")
                     return img_base64, filename
@@ -486,38 +617,51 @@ class AIService:
             return None, None
 
     def _format_web_context(self, web_search_results: Dict[str, Any], sustainability_data: Dict[str, Any]) -> str:
-        """Format web search results for LLM context"""
+        """Format web search results for LLM context, capped at MAX_WEB_CONTEXT_CHARS"""
         context_parts = []
+        total = 0
         
         try:
-            # Add web search results
-            for query_key, query_data in web_search_results.items():
-                if isinstance(query_data, dict) and 'answer' in query_data:
-                    context_parts.append(f"Query: {query_data.get('query', '')}")
-                    context_parts.append(f"Answer: {query_data.get('answer', '')}")
-                    
-                    # Add results if available
-                    for result in query_data.get('results', [])[:2]:  # Limit to 2 results per query
-                        if 'content' in result:
-                            context_parts.append(f"Source: {result.get('title', 'Unknown')}")
-                            context_parts.append(f"Content: {result.get('content', '')[:300]}...")
-                    context_parts.append("---")
-            
-            # Add sustainability data
-            context_parts.append("\nSUSTAINABILITY DATA:")
-            for query_key, query_data in sustainability_data.items():
-                if isinstance(query_data, dict) and 'answer' in query_data:
-                    context_parts.append(f"Sustainability Query: {query_data.get('query', '')}")
-                    context_parts.append(f"Findings: {query_data.get('answer', '')}")
-            
-            formatted_context = "\n".join(context_parts)
-            return formatted_context[:4000]  # Limit context size
+            # Stop formatting as soon as the budget is spent instead of joining everything and slicing
+            for piece in self._iter_web_context(web_search_results, sustainability_data):
+                separator = 1 if context_parts else 0
+                remaining = MAX_WEB_CONTEXT_CHARS - total - separator
+                if len(piece) >= remaining:
+                    context_parts.append(piece[:remaining])
+                    break
+                context_parts.append(piece)
+                total += separator + len(piece)
+            
+            return "\n".join(context_parts)
             
         except Exception as e:
             logger.error(f"Error formatting web context: {e}")
             return "Web context temporarily unavailable"
 
-    def _create_enhanced_diy_prompt(self, product_name: str, materials: List[str], diy_tutorials: Dict[str, Any]) -> str:
+    def _iter_web_context(self, web_search_results: Dict[str, Any], sustainability_data: Dict[str, Any]) -> Iterator[str]:
+        """Lazily yield the lines of the web context in prompt order"""
+        # Add web search results
+        for query_data in web_search_results.values():
+            if isinstance(query_data, dict) and 'answer' in query_data:
+                yield f"Query: {query_data.get('query', '')}"
+                yield f"Answer: {query_data['answer']}"
+                
+                # Add results if available
+                for result in query_data.get('results', [])[:2]:  # Limit to 2 results per query
+                    content = result.get('content')
+                    if content is not None:
+                        yield f"Source: {result.get('title', 'Unknown')}"
+                        yield f"Content: {content[:300]}..."
+                yield "---"
+        
+        # Add sustainability data
+        yield "\nSUSTAINABILITY DATA:"
+        for query_data in sustainability_data.values():
+            if isinstance(query_data, dict) and 'answer' in query_data:
+                yield f"Sustainability Query: {query_data.get('query', '')}"
+                yield f"Findings: {query_data['answer']}"
+
+    def _create_enhanced_diy_prompt(self, product_name: str, materials: List[str], tutorials: List[Tutorial]) -> str:
         """Create enhanced DIY prompt using scraped tutorial data"""
         tutorial_context = ""
         
@@ -525,14 +669,13 @@ class AIService:
             # Extract useful information from scraped tutorials
             tutorial_insights = []
             
-            for tutorial_key, tutorial_data in diy_tutorials.items():
-                if 'scraped_tutorials' in tutorial_data:
-                    for tutorial in tutorial_data['scraped_tutorials']:
-                        if tutorial.get('success', False):
-                            if tutorial.get('steps'):
-                                tutorial_insights.append(f"Tutorial steps found: {'; '.join(tutorial['steps'][:3])}")
-                            if tutorial.get('materials'):
-                                tutorial_insights.append(f"Materials used: {', '.join(tutorial['materials'][:5])}")
+            for tutorial in tutorials:
+                if not tutorial.success:
+                    continue
+                if tutorial.steps:
+                    tutorial_insights.append(f"Tutorial steps found: {'; '.join(tutorial.steps[:3])}")
+                if tutorial.materials:
+                    tutorial_insights.append(f"Materials used: {', '.join(tutorial.materials[:5])}")
             
             if tutorial_insights:
                 tutorial_context = f"Real tutorial insights for {product_name}:\n" + "\n".join(tutorial_insights[:5])
@@ -587,36 +730,64 @@ Focus on:
         
         return enhanced_prompt
 
-    def _enhance_image_prompt(self, base_prompt: str, diy_tutorials: Dict[str, Any], product_name: str) -> str:
-        """Enhance image generation prompt with insights from scraped tutorials"""
+    def _flatten_tutorials(self, diy_tutorials: Dict[str, Any]) -> List[Tutorial]:
+        """Flatten scrape_diy_tutorials' per-query results into one list of Tutorial records"""
+        tutorials = []
+        
+        try:
+            for tutorial_data in diy_tutorials.values():
+                if not isinstance(tutorial_data, dict):
+                    continue
+                for tutorial in tutorial_data.get('scraped_tutorials', ()):
+                    tutorials.append(Tutorial(
+                        success=tutorial.get('success', False),
+                        url=tutorial.get('url', ''),
+                        title=tutorial.get('title', ''),
+                        content=tutorial.get('content', ''),
+                        steps=tutorial.get('steps') or [],
+                        materials=tutorial.get('materials') or [],
+                        error=tutorial.get('error', 'Unknown error')
+                    ))
+        except Exception as e:
+            logger.error(f"Error flattening scraped tutorials: {e}")
+        
+        return tutorials
+
+    def _process_tutorials(self, tutorials: List[Tutorial]) -> Tuple[List[str], List[Dict[str, str]]]:
+        """Collect image-prompt visual details and tutorial sources in a single pass over the scraped tutorials"""
+        visual_details = []
+        sources = []
+        seen_urls = set()
+        
+        for tutorial in tutorials:
+            # Only two visual details and five sources are ever used
+            if len(visual_details) >= MAX_VISUAL_DETAILS and len(sources) >= 5:
+                break
+            if not tutorial.success:
+                continue
+            
+            # Overlapping Tavily results often return the same page under several queries
+            url = tutorial.url
+            if len(sources) < 5 and not (url and url in seen_urls):  # Limit to 5 sources
+                seen_urls.add(url)
+                sources.append({
+                    'title': tutorial.title or 'DIY Tutorial',
+                    'url': url,
+                    'type': 'Tutorial'
+                })
+            
+            if tutorial.content and len(visual_details) < MAX_VISUAL_DETAILS:
+                visual_details.extend(_visual_details_for(tutorial.content))
+        
+        return visual_details[:MAX_VISUAL_DETAILS], sources
+
+    def _enhance_image_prompt(self, base_prompt: str, visual_details: List[str]) -> str:
+        """Enhance image generation prompt with visual details from scraped tutorials"""
         try:
-            # Extract visual details from scraped tutorials
-            visual_details = []
-            
-            for tutorial_key, tutorial_data in diy_tutorials.items():
-                if 'scraped_tutorials' in tutorial_data:
-                    for tutorial in tutorial_data['scraped_tutorials']:
-                        if tutorial.get('success', False) and tutorial.get('content'):
-                            content = tutorial['content'].lower()
-                            
-                            # Look for color mentions
-                            colors = ['red', 'blue', 'green', 'yellow', 'white', 'black', 'brown', 'purple', 'orange', 'pink']
-                            for color in colors:
-                                if color in content:
-                                    visual_details.append(f"with {color} accents")
-                                    break
-                            
-                            # Look for finish descriptions
-                            finishes = ['glossy', 'matte', 'rustic', 'modern', 'vintage', 'polished', 'painted']
-                            for finish in finishes:
-                                if finish in content:
-                                    visual_details.append(f"featuring {finish} finish")
-                                    break
-            
             # Enhance the base prompt
             enhancement = ""
             if visual_details:
-                enhancement = f", {', '.join(visual_details[:2])}"
+                enhancement = f", {', '.join(visual_details[:MAX_VISUAL_DETAILS])}"
             
             enhanced_prompt = f"{base_prompt}{enhancement}, photographed in natural lighting with a clean, professional background, showing fine details and textures, high quality product photography style"
             
@@ -626,47 +797,13 @@ Focus on:
             logger.error(f"Error enhancing image prompt: {e}")
             return base_prompt
 
-    def _extract_tutorial_sources(self, diy_tutorials: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Extract tutorial source information"""
-        sources = []
-        
+    async def _generate_basic_diy_projects(self, file_path: str, image: Optional["Image.Image"] = None) -> Dict[str, Any]:
+        """Fallback method for basic DIY project generation, reusing the caller's decoded image when given"""
         try:
-            for tutorial_key, tutorial_data in diy_tutorials.items():
-                if 'scraped_tutorials' in tutorial_data:
-                    for tutorial in tutorial_data['scraped_tutorials']:
-                        if tutorial.get('success', False):
-                            sources.append({
-                                'title': tutorial.get('title', 'DIY Tutorial'),
-                                'url': tutorial.get('url', ''),
-                                'type': 'Tutorial'
-                            })
-                        
-                if len(sources) >= 5:  # Limit to 5 sources
-                    break
-                    
-        except Exception as e:
-            logger.error(f"Error extracting tutorial sources: {e}")
-        
-        return sources
-
-    async def _generate_basic_diy_projects(self, file_path: str) -> Dict[str, Any]:
-        """Fallback method for basic DIY project generation"""
-        try:
-            image = Image.open(file_path)
-            response = self.model.generate_content([DIY_ANALYSIS_PROMPT, image])
-            
-            response_text = response.text.strip()
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                else:
-                    result = self._parse_diy_response(response_text)
-            except json.JSONDecodeError:
-                result = self._parse_diy_response(response_text)
-            
-            return result
+            # A rough look at the item is enough for generic ideas, so send a smaller payload
+            image = await asyncio.to_thread(load_downscaled_image, file_path, image)
+            # Streamed so parsing can start as soon as the JSON object is complete
+            return await self._gemini_json([DIY_ANALYSIS_PROMPT, image], self._parse_diy_response, stream=True)
             
         except Exception as e:
             logger.error(f"Error in basic DIY generation: {e}")
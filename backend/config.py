@@ -10,13 +10,19 @@ class Config:
     SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
     SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+    WORKERS = int(os.getenv("WORKERS", 2 * (os.cpu_count() or 1) + 1))  # Ignored when DEBUG reloads
+    CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",") if origin.strip()]
     
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10485760))  # 10MB
-    ALLOWED_EXTENSIONS = os.getenv("ALLOWED_EXTENSIONS", "jpg,jpeg,png,mp4,mov,avi").split(",")
+    ALLOWED_EXTENSIONS = frozenset(os.getenv("ALLOWED_EXTENSIONS", "jpg,jpeg,png,mp4,mov,avi").split(","))
     
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
     TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))
     MAX_OUTPUT_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", 1000))
+    AI_MAX_WORKERS = int(os.getenv("AI_MAX_WORKERS", 8))  # Threads for blocking Gemini/PIL calls
+    AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", 4))  # Analyses allowed in flight per worker
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 3600))  # Seconds
     
     UPLOAD_DIR = "uploads"
     TEMP_DIR = "temp"
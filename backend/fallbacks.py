@@ -0,0 +1,21 @@
+"""
+Per-request record of degraded results, shared by the AI and web search services
+"""
+from contextvars import ContextVar
+from typing import List, Optional
+
+# Fallbacks hit while serving the current request; a mutable list so tasks and threads spawned
+# from the request (which copy the context) report into the same one
+_fallbacks_used: ContextVar[Optional[List[str]]] = ContextVar("fallbacks_used", default=None)
+
+def track_fallbacks() -> List[str]:
+    """Start recording fallbacks for the current request and return the list they are appended to"""
+    used: List[str] = []
+    _fallbacks_used.set(used)
+    return used
+
+def note_fallback(reason: str):
+    """Record that a degraded result is being returned, so callers know not to cache it"""
+    used = _fallbacks_used.get()
+    if used is not None:
+        used.append(reason)
@@ -1,75 +1,100 @@
 import os
-import shutil
+import uuid
+import asyncio
+import hashlib
 import logging
-from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+
+# Bound once so the per-upload path does plain global lookups
+ALLOWED_EXTENSIONS = Config.ALLOWED_EXTENSIONS
+MAX_FILE_SIZE = Config.MAX_FILE_SIZE
+TEMP_DIR = Config.TEMP_DIR  # Created by main.ensure_directories at startup
+
 class FileService:
-    def __init__(self):
-        Path(Config.UPLOAD_DIR).mkdir(exist_ok=True)
-        Path(Config.TEMP_DIR).mkdir(exist_ok=True)
-    
-    def validate_file(self, file: UploadFile) -> bool:
+    def validate_file(self, file: UploadFile) -> Optional[str]:
+        """Return the lowercased extension (without the dot) if the upload is allowed, else None"""
         if not file.filename:
-            return False
+            return None
         
-        extension = file.filename.split('.')[-1].lower()
-        if extension not in Config.ALLOWED_EXTENSIONS:
-            return False
+        extension = os.path.splitext(file.filename)[1][1:].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            return None
         
-        return True
+        return extension
     
-    async def save_upload(self, file: UploadFile) -> str:
-        if not self.validate_file(file):
+    async def save_upload(self, file: UploadFile) -> Tuple[str, str]:
+        """Write the upload to the temp dir and return (file_path, content digest)"""
+        extension = self.validate_file(file)
+        if not extension:
             raise HTTPException(status_code=400, detail="Invalid file type")
         
-        import time
-        timestamp = str(int(time.time()))
-        extension = file.filename.split('.')[-1].lower()
-        filename = f"{timestamp}_{file.filename}"
-        file_path = os.path.join(Config.TEMP_DIR, filename)
+        # Random name: no same-second collisions and no client-supplied text in the path
+        filename = f"{uuid.uuid4().hex}.{extension}"
+        file_path = os.path.join(TEMP_DIR, filename)
         
         try:
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                
-                if len(content) > Config.MAX_FILE_SIZE:
-                    raise HTTPException(status_code=400, detail="File too large")
-                
-                buffer.write(content)
+            # The body is already spooled by Starlette, so its size is known before copying anything
+            size = file.file.seek(0, os.SEEK_END)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=400, detail="File too large")
+            file.file.seek(0)
+            
+            # Copy with a large buffer off the event loop, hashing each chunk on the way through
+            digest = await asyncio.to_thread(self._copy_upload, file.file, file_path)
             
             logger.info(f"File saved: {file_path}")
-            return file_path
+            return file_path, digest
             
+        except HTTPException:
+            self._remove_quietly(file_path)
+            raise
         except Exception as e:
             logger.error(f"Error saving file: {e}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            self._remove_quietly(file_path)
             raise HTTPException(status_code=500, detail="Error saving file")
     
+    def _copy_upload(self, source: BinaryIO, file_path: str) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(file_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_COPY_BUFFER_SIZE):
+                hasher.update(chunk)
+                buffer.write(chunk)
+        return hasher.hexdigest()
+    
+    def _remove_quietly(self, file_path: str):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+    
     def cleanup_file(self, file_path: str):
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Cleaned up file: {file_path}")
-        except Exception as e:
+            os.remove(file_path)
+            logger.info(f"Cleaned up file: {file_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
             logger.error(f"Error cleaning up file {file_path}: {e}")
     
     def cleanup_temp_files(self, max_age_hours: int = 24):
         try:
             import time
             current_time = time.time()
-            temp_path = Path(Config.TEMP_DIR)
+            max_age_seconds = max_age_hours * 3600
             
-            for file_path in temp_path.iterdir():
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (max_age_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Cleaned up old file: {file_path}")
+            # scandir reuses the directory entry's type info instead of stat-ing each path twice
+            with os.scandir(TEMP_DIR) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if current_time - entry.stat(follow_symlinks=False).st_mtime > max_age_seconds:
+                        os.unlink(entry.path)
+                        logger.info(f"Cleaned up old file: {entry.path}")
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
@@ -1,35 +1,49 @@
-from jinja2 import Template
+import os
+import json
+from pathlib import Path
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+from schemas import PRODUCT_ANALYSIS_EXAMPLE
+
+# Compiled template bytecode is persisted next to this module so later process starts skip the parse/compile step
+JINJA_CACHE_DIR = Path(__file__).parent / ".jinja_cache"
+
+class _LazyDirBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that creates its directory on the first write rather than up front"""
+    
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+def _json_skeleton(example: dict) -> str:
+    """Render one field per line, keeping list values inline the way the prompt has always shown them"""
+    return "{\n" + ",\n".join(f'  "{key}": {json.dumps(value)}' for key, value in example.items()) + "\n}"
 
 # Product Analysis Prompts - Focus on Environmental Sustainability
+# The field skeleton comes from the same example ProductDetails is built from
 PRODUCT_ANALYSIS_PROMPT = """
 You are a professional Product Analyzer focused on environmental sustainability. 
 Analyze the product in the provided image and extract information in JSON format.
 
 Please provide your response as a JSON object with these fields:
-{
-  "product_name": "Name of the product",
-  "product_description": "Detailed description of the product",
-  "materials": ["material1", "material2"],
-  "manufacturing_location": "Location if visible",
-  "packaging_info": "Description of packaging",
-  "product_appearance": "Visual description"
-}
+""" + _json_skeleton(PRODUCT_ANALYSIS_EXAMPLE) + """
 
 Focus on information relevant to environmental impact assessment.
 """
 
-ENVIRONMENTAL_ANALYSIS_PROMPT = Template("""
+# Rendered on every product analysis, so it is a plain f-string builder rather than a Jinja template
+def build_environmental_analysis_prompt(product_name, product_description, materials, manufacturing_location, packaging_info, web_context) -> str:
+    return f"""
 You are an Environmental Sustainability Expert. Based on the following product information, provide a comprehensive sustainability analysis:
 
 Product Details:
-- Name: {{ product_name }}
-- Description: {{ product_description }}
-- Materials/Ingredients: {{ materials }}
-- Manufacturing Location: {{ manufacturing_location }}
-- Packaging: {{ packaging_info }}
+- Name: {product_name}
+- Description: {product_description}
+- Materials/Ingredients: {materials}
+- Manufacturing Location: {manufacturing_location}
+- Packaging: {packaging_info}
 
 Web Research Context:
-{{ web_context }}
+{web_context}
 
 Provide detailed analysis on:
 
@@ -56,8 +70,8 @@ Consider factors like:
 - Manufacturing processes and energy use
 - Recyclability and end-of-life impact
 - Local vs imported sourcing
-- Renewable vs non-renewable materials
-""")
+- Renewable vs non-renewable materials"""
+
 
 DIY_ANALYSIS_PROMPT = """
 You are a Creative DIY Upcycling Expert focused on environmental sustainability. 
@@ -99,7 +113,7 @@ Focus on:
 - Providing detailed visual descriptions for image generation
 """
 
-SEARCH_QUERIES_PROMPT = Template("""
+_SEARCH_QUERIES_TEMPLATE = """
 You are an environmental research query generator. Based on this product information, create 4 specific web search queries to find current information about:
 
 1. Environmental impact and carbon footprint data
@@ -112,10 +126,10 @@ Description: {{ product_description }}
 Materials: {{ materials }}
 Manufacturing Location: {{ manufacturing_location }}
 
-Return only a Python list of 4 search query strings focused on environmental sustainability.
-""")
+Return only a JSON array of 4 search query strings focused on environmental sustainability.
+"""
 
-ENVIRONMENTAL_RECOMMENDATION_PROMPT = Template("""
+_ENVIRONMENTAL_RECOMMENDATION_TEMPLATE = """
 Based on the comprehensive environmental analysis, provide an overall sustainability recommendation:
 
 Product: {{ product_name }}
@@ -130,7 +144,22 @@ Provide a clear, actionable recommendation (2-3 sentences) on whether environmen
 - Avoid this product entirely (if score <= 3)
 
 Include the main environmental reason for your recommendation and one specific alternative if suggesting to avoid.
-""")
+"""
+
+# One shared Environment for every Jinja prompt
+_env = Environment(
+    loader=DictLoader({
+        "search_queries": _SEARCH_QUERIES_TEMPLATE,
+        "env_recommendation": _ENVIRONMENTAL_RECOMMENDATION_TEMPLATE,
+    }),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    autoescape=False,
+    bytecode_cache=_LazyDirBytecodeCache(directory=str(JINJA_CACHE_DIR)),
+)
+
+SEARCH_QUERIES_PROMPT = _env.get_template("search_queries")
+ENVIRONMENTAL_RECOMMENDATION_PROMPT = _env.get_template("env_recommendation")
 
 WEB_SEARCH_CONTEXT_PROMPT = """
 Based on the following web search results about the product, extract and summarize key environmental sustainability information:
@@ -0,0 +1,26 @@
+from typing import List
+from pydantic import BaseModel, ConfigDict
+
+# Example object shown to Gemini in PRODUCT_ANALYSIS_PROMPT; its keys are the ProductDetails fields
+PRODUCT_ANALYSIS_EXAMPLE = {
+    "product_name": "Name of the product",
+    "product_description": "Detailed description of the product",
+    "materials": ["material1", "material2"],
+    "manufacturing_location": "Location if visible",
+    "packaging_info": "Description of packaging",
+    "product_appearance": "Visual description"
+}
+
+class ProductDetails(BaseModel):
+    """Product fields requested by PRODUCT_ANALYSIS_PROMPT; extra keys from the model are kept"""
+    model_config = ConfigDict(extra="allow")
+    
+    product_name: str = "Unknown Product"
+    product_description: str = ""
+    materials: List[str] = []
+    manufacturing_location: str = "Unknown"
+    packaging_info: str = ""
+    product_appearance: str = ""
+
+# Build the validator at import rather than on the first request
+ProductDetails.model_rebuild()